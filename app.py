@@ -18,6 +18,9 @@ SLACK_BOT_TOKEN     (Required): Bot token for Slack API access
 SLACK_SIGNING_SECRET (Required): Signing secret for HTTP mode webhook verification
 GOOGLE_API_KEY      (Required): Google API key for Gemini API access (use with OpenAI-compatible endpoint)
 DISCOUNT_CODE       (Optional): The secret discount code to guard (default: 4b0daf70118becc1)
+LOG_LEVEL           (Optional): Logging level; per-mention details are logged at DEBUG (default: INFO)
+STREAM_UPDATE_INTERVAL (Optional): Minimum seconds between edits of a streaming reply (default: 1.0)
+SEMANTIC_CACHE_ENABLED (Optional): Reuse responses for near-duplicate prompts (default: false, needs numpy and sentence-transformers)
 
 System Prompt:
 The system prompt is defined in prompt.py and uses the DISCOUNT_CODE environment variable.
@@ -25,23 +28,46 @@ The system prompt is defined in prompt.py and uses the DISCOUNT_CODE environment
 """
 import os
 import re
+import queue
+import ssl
+import atexit
+import time
+import asyncio
+import hashlib
 import logging
-from openai import OpenAI
-from slack_bolt import App
-from slack_sdk import WebClient
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from collections import OrderedDict, deque
+import httpx
+from openai import AsyncOpenAI
+from slack_bolt.async_app import AsyncApp
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
 from dotenv import load_dotenv
-from prompt import get_system_prompt
+from prompt import DEFAULT_DISCOUNT_CODE, get_system_prompt
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging (console only)
+# Configure logging (console only). Records are queued and written to the
+# console by a background listener thread so handlers never block on stdout.
+LOG_LEVEL = (os.environ.get("LOG_LEVEL") or "INFO").upper()
+INVALID_LOG_LEVEL = None
+if LOG_LEVEL not in logging.getLevelNamesMapping():
+    INVALID_LOG_LEVEL, LOG_LEVEL = LOG_LEVEL, "INFO"
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_queue = queue.SimpleQueue()
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
+    level=LOG_LEVEL,
+    format='%(message)s',
+    handlers=[QueueHandler(log_queue)]
 )
+log_listener = QueueListener(log_queue, console_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
+if INVALID_LOG_LEVEL:
+    logger.warning("Unknown LOG_LEVEL %r, falling back to INFO", INVALID_LOG_LEVEL)
 
 # Get environment variables
 SLACK_BOT_TOKEN = os.environ.get("SLACK_BOT_TOKEN")
@@ -61,10 +87,20 @@ GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API_KEY environment variable is required for Gemini API")
 
-DISCOUNT_CODE = os.environ.get("DISCOUNT_CODE", "4b0daf70118becc1")
+DISCOUNT_CODE = os.environ.get("DISCOUNT_CODE", DEFAULT_DISCOUNT_CODE)
+try:
+    STREAM_UPDATE_INTERVAL = float(os.environ.get("STREAM_UPDATE_INTERVAL") or 1.0)
+except ValueError:
+    logger.warning("Invalid STREAM_UPDATE_INTERVAL %r, falling back to 1.0", os.environ["STREAM_UPDATE_INTERVAL"])
+    STREAM_UPDATE_INTERVAL = 1.0
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+
+# Slack mention tokens such as <@U1234567890>, with any whitespace that follows
+MENTION_PATTERN = re.compile(r'<@[^>]+>\s*')
 
 # Generate system prompt using the discount code
 SYSTEM_PROMPT = get_system_prompt(DISCOUNT_CODE)
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
 # Log startup configuration
 logger.info("=== SLACK BOT STARTUP ===")
@@ -74,41 +110,368 @@ logger.info(f"Google API Key: {GOOGLE_API_KEY[:12]}..." if GOOGLE_API_KEY else "
 logger.info(f"Discount Code: {DISCOUNT_CODE}")
 logger.info("==========================")
 
+# Shared HTTP client for Gemini: the SSL context is built once and
+# keep-alive connections are reused across calls
+_ssl_context = ssl.create_default_context()
+http_client = httpx.AsyncClient(
+    verify=_ssl_context,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=600),
+    timeout=httpx.Timeout(30.0, connect=5.0)
+)
+
 # Initialize OpenAI client for Gemini
-client = OpenAI(
+client = AsyncOpenAI(
     api_key=GOOGLE_API_KEY,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+    http_client=http_client
 )
 
-app = App(
+# Upper bound on in-flight Gemini requests, to avoid bursts of 429s
+GEMINI_MAX_CONCURRENCY = 16
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# Acknowledge events before running listeners: Bolt then runs handle_mention as
+# a background task on the event loop, so Gemini calls never hold up the HTTP
+# response to Slack (which retries events not acked within 3 seconds) and many
+# mentions can be in flight at once
+app = AsyncApp(
     token=SLACK_BOT_TOKEN,
-    signing_secret=SLACK_SIGNING_SECRET
+    signing_secret=SLACK_SIGNING_SECRET,
+    process_before_response=False
 )
-sync_client = WebClient(token=SLACK_BOT_TOKEN)
+# Retry Slack calls that are rate limited (HTTP 429) so final replies are still written;
+# Bolt copies these handlers onto the client it passes to listeners
+app.client.retry_handlers.append(AsyncRateLimitErrorRetryHandler(max_retry_count=2))
+
+class ResponseCache:
+    """Thread-safe LRU cache of Gemini responses keyed by the SHA-256 of the system and user prompts"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str) -> str:
+        return hashlib.sha256(f"{SYSTEM_PROMPT}\x00{prompt}".encode()).hexdigest()
+
+    def get(self, prompt: str):
+        key = self.key(prompt)
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, prompt: str, response: str) -> None:
+        key = self.key(prompt)
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+response_cache = ResponseCache(maxsize=1024)
+
+class SemanticCache:
+    """
+    Cache of Gemini responses matched by cosine similarity of prompt embeddings.
+
+    Requires the optional numpy and sentence-transformers packages. Embeddings are
+    stored normalized in a single matrix, so a lookup is one matrix-vector product.
+    Once maxsize entries are held, the oldest entry is overwritten (FIFO).
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 threshold: float = 0.92, maxsize: int = 5000):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._np = None
+        self._disabled = False
+        self._embeddings = None
+        self._responses = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        with self._lock:
+            if self._model is None and not self._disabled:
+                try:
+                    import numpy
+                    from sentence_transformers import SentenceTransformer
+                    self._np = numpy
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+                    logger.info("🧠 Semantic cache loaded embedding model %s", self.model_name)
+                except Exception as e:
+                    self._disabled = True
+                    logger.warning("Semantic cache disabled, could not load embedding model: %s", e)
+        return self._model
+
+    def embed(self, prompt: str):
+        """Return the normalized embedding of the prompt, or None if the model is unavailable"""
+        model = self._load_model()
+        if model is None:
+            return None
+        return model.encode(prompt, normalize_embeddings=True).astype(self._np.float32)
+
+    def get(self, embedding):
+        with self._lock:
+            count = len(self._responses)
+            if count:
+                similarities = self._embeddings[:count] @ embedding
+                best = int(similarities.argmax())
+                if similarities[best] > self.threshold:
+                    self.hits += 1
+                    return self._responses[best]
+            self.misses += 1
+            return None
+
+    def put(self, embedding, response: str) -> None:
+        np = self._np
+        with self._lock:
+            count = len(self._responses)
+            if self._embeddings is None:
+                self._embeddings = np.empty((min(64, self.maxsize), embedding.shape[0]), dtype=np.float32)
+            elif count == len(self._embeddings) and count < self.maxsize:
+                # Grow the matrix by doubling so appends stay amortized O(1)
+                grown = np.empty((min(2 * count, self.maxsize), embedding.shape[0]), dtype=np.float32)
+                grown[:count] = self._embeddings
+                self._embeddings = grown
+
+            if count < self.maxsize:
+                index = count
+                self._responses.append(response)
+            else:
+                index = self._next
+                self._responses[index] = response
+                self._next = (index + 1) % self.maxsize
+            self._embeddings[index] = embedding
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._responses)}
+
+semantic_cache = SemanticCache() if SEMANTIC_CACHE_ENABLED else None
+
+GEMINI_ERROR_MESSAGE = 'Sorry, I could not reach the Gemini service.'
+
+async def call_llm(prompt: str, on_partial=None) -> str:
+    """
+    Call the Google Gemini API using OpenAI client.
+
+    If on_partial is given the completion is streamed and on_partial is called
+    with the list of chunks received so far after each chunk. It must not block:
+    it runs while holding a Gemini concurrency slot. Cached responses are returned
+    without calling it.
+    """
+    cached_response = response_cache.get(prompt)
+    if cached_response is not None:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("💾 Response cache hit - %s", response_cache.stats())
+        return cached_response
+
+    # Embedding is CPU-bound, so keep it off the event loop
+    embedding = await asyncio.to_thread(semantic_cache.embed, prompt) if semantic_cache else None
+    if embedding is not None:
+        cached_response = semantic_cache.get(embedding)
+        if cached_response is not None:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🧠 Semantic cache hit - %s", semantic_cache.stats())
+            return cached_response
 
-def call_llm(prompt: str) -> str:
-    """Call the Google Gemini API using OpenAI client"""
     try:
-        logger.info(f"🤖 Calling Gemini API with prompt length: {len(prompt)} chars")
-        response = client.chat.completions.create(
-            model="gemini-2.5-flash",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        response_content = response.choices[0].message.content
-        logger.info(f"✅ Gemini API success - Response length: {len(response_content)} chars")
+        logger.info("🤖 Calling Gemini API with prompt length: %d chars", len(prompt))
+        async with gemini_semaphore:
+            response = await client.chat.completions.create(
+                model="gemini-2.5-flash",
+                # No Gemini context caching applies here: both implicit caching and explicit
+                # cachedContents need a prefix of at least 1024 tokens, and SYSTEM_PROMPT is
+                # far shorter, so the explicit cache is not used.
+                messages=[
+                    SYSTEM_MESSAGE,
+                    {"role": "user", "content": prompt}
+                ],
+                stream=on_partial is not None
+            )
+
+            if on_partial is None:
+                response_content = response.choices[0].message.content
+            else:
+                parts = []
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        on_partial(parts)
+                response_content = "".join(parts)
+
+        # Blocked or thinking-exhausted answers come back with no content
+        if not response_content:
+            logger.error("❌ Gemini API returned an empty response")
+            return GEMINI_ERROR_MESSAGE
+
+        logger.info("✅ Gemini API success - Response length: %d chars", len(response_content))
+        response_cache.put(prompt, response_content)
+        if embedding is not None:
+            semantic_cache.put(embedding, response_content)
         return response_content
         
     except Exception as error:
-        logger.error(f'❌ Error calling Gemini API: {error}')
-        return 'Sorry, I could not reach the Gemini service.'
+        logger.error("❌ Error calling Gemini API: %s", error)
+        return GEMINI_ERROR_MESSAGE
+
+class SlackEditLimiter:
+    """
+    Shared budget for chat.update calls across all streaming replies.
+
+    chat.update is a Tier 3 Slack method (about 50 calls per minute). Partial
+    edits are skipped once the budget for the last minute is used up; final
+    edits are always sent and only counted, with real 429s left to the client's
+    rate-limit retry handler.
+    """
+
+    def __init__(self, per_minute: int = 50):
+        self.per_minute = per_minute
+        self._sent = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._sent and now - self._sent[0] >= 60:
+            self._sent.popleft()
+
+    def try_acquire(self, count: int = 1) -> bool:
+        """Record count edits if they fit in the budget right now, without waiting"""
+        now = time.monotonic()
+        self._expire(now)
+        if len(self._sent) + count > self.per_minute:
+            return False
+        self._sent.extend([now] * count)
+        return True
+
+    def record(self, count: int = 1) -> None:
+        """Count edits that are sent regardless of the budget"""
+        now = time.monotonic()
+        self._expire(now)
+        self._sent.extend([now] * count)
+
+slack_edit_limiter = SlackEditLimiter()
+
+class StreamingReply:
+    """
+    Reply to a mention and edit the reply in place as Gemini streams.
+
+    The first partial posts the reply (in the channel and/or thread, as configured);
+    later partials edit those messages with chat.update, at most once per
+    STREAM_UPDATE_INTERVAL seconds per reply and within slack_edit_limiter's
+    shared budget. Partials that do not fit are skipped; the final text is
+    written as soon as it is ready.
+    """
+
+    def __init__(self, say, slack_client, user_id: str, thread_ts: str):
+        self.say = say
+        self.slack_client = slack_client
+        self.user_id = user_id
+        self.thread_ts = thread_ts
+        self._messages = []
+        self._text = None
+        self._last_sent = 0.0
+        self._pending = None
+
+    def update(self, parts: list) -> None:
+        """Schedule an edit showing the partial text, if the rate limits allow one now"""
+        if self._pending is not None and not self._pending.done():
+            return
+        if time.monotonic() - self._last_sent < STREAM_UPDATE_INTERVAL:
+            return
+        if self._messages and not slack_edit_limiter.try_acquire(len(self._messages)):
+            return
+        self._last_sent = time.monotonic()
+        # Slack I/O runs as its own task so it never holds up the Gemini stream
+        self._pending = asyncio.create_task(self._send_partial("".join(parts)))
+
+    async def finish(self, text: str) -> None:
+        """Show the complete response"""
+        if self._pending is not None:
+            await self._pending
+        text = text or GEMINI_ERROR_MESSAGE
+        if text == self._text:
+            return
+        if self._messages:
+            slack_edit_limiter.record(len(self._messages))
+        await self._send(text)
+
+    async def _send_partial(self, text: str) -> None:
+        try:
+            await self._send(text)
+        except Exception as e:
+            logger.warning("Could not update streaming reply: %s", e)
+
+    async def _send(self, text: str) -> None:
+        reply = f"<@{self.user_id}> {text}"
+        if not self._messages:
+            if SHOULD_REPLY_IN_CHANNEL:
+                # Reply in main channel
+                result = await self.say(reply)
+                self._messages.append((result['channel'], result['ts']))
+            # Reply in thread
+            result = await self.say(reply, thread_ts=self.thread_ts)
+            self._messages.append((result['channel'], result['ts']))
+        else:
+            for channel, ts in self._messages:
+                await self.slack_client.chat_update(channel=channel, ts=ts, text=reply)
+        self._text = text
+
+def strip_mentions(text: str) -> str:
+    """Remove Slack mention tokens from message text"""
+    # Fast path: the usual app_mention text is a single leading <@U...> token
+    if text[:2] == '<@':
+        end = text.find('>', 2)
+        if end > 2 and '<@' not in text[end:]:
+            return text[end + 1:].strip()
+    return MENTION_PATTERN.sub('', text).strip()
+
+async def prewarm_gemini() -> None:
+    """Open a keep-alive TLS connection to Gemini so the first mention skips the handshake"""
+    try:
+        await client.models.list()
+        logger.info("🔥 Gemini connection pre-warmed")
+    except Exception as error:
+        logger.warning("Could not pre-warm Gemini connection: %s", error)
+
+user_cache = OrderedDict()
+
+async def fetch_user(user_id: str) -> tuple:
+    """Look up (username, display_name, real_name) for a Slack user, cached per process (LRU)"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        user_cache.move_to_end(user_id)
+        return user
+
+    user_info = await app.client.users_info(user=user_id)
+    username = user_info['user']['name']
+    display_name = user_info['user'].get('profile', {}).get('display_name', username)
+    real_name = user_info['user'].get('profile', {}).get('real_name', username)
+    user = (username, display_name, real_name)
+
+    user_cache[user_id] = user
+    if len(user_cache) > 4096:
+        user_cache.popitem(last=False)
+    return user
 
 # Listen for mentions (when someone tags the bot)
 @app.event("app_mention")
-def handle_mention(event, say, client):
+async def handle_mention(event, say, client):
     """Handle when the bot is mentioned with @botname"""
     
     # Extract event details
@@ -119,55 +482,54 @@ def handle_mention(event, say, client):
     
     # Get user information
     try:
-        user_info = sync_client.users_info(user=user_id)
-        username = user_info['user']['name']
-        display_name = user_info['user'].get('profile', {}).get('display_name', username)
-        real_name = user_info['user'].get('profile', {}).get('real_name', username)
+        username, display_name, real_name = await fetch_user(user_id)
     except Exception as e:
         username = user_id
         display_name = user_id
         real_name = user_id
-        logger.warning(f"Could not fetch user info for {user_id}: {e}")
+        logger.warning("Could not fetch user info for %s: %s", user_id, e)
     
     # Log detailed mention information
-    logger.info("=== BOT MENTION RECEIVED ===")
-    logger.info(f"Message ID: {message_ts}")
-    logger.info(f"Channel ID: {channel_id}")
-    logger.info(f"User ID: {user_id}")
-    logger.info(f"Username: @{username}")
-    logger.info(f"Display Name: {display_name}")
-    logger.info(f"Real Name: {real_name}")
-    logger.info(f"Original Message: {original_text}")
-    logger.info("=============================")
+    logger.info("📨 Mention %s in %s from @%s: %s", message_ts, channel_id, username, original_text)
+    logger.debug("User ID: %s", user_id)
+    logger.debug("Display Name: %s", display_name)
+    logger.debug("Real Name: %s", real_name)
     
     try:
         # Remove the bot mention from the text
         # The mention format is usually <@U1234567890> so we need to clean it
-        cleaned_text = re.sub(r'<@[^>]+>\s*', '', original_text).strip()
+        cleaned_text = strip_mentions(original_text)
         
-        logger.info(f"Cleaned Message: {cleaned_text}")
+        logger.debug("Cleaned Message: %s", cleaned_text)
         
         if cleaned_text:
-            logger.info("Sending to Gemini...")
-            response = call_llm(cleaned_text)
-            logger.info(f"Gemini Response: {response}")
-
-            if SHOULD_REPLY_IN_CHANNEL:
-                # Reply in main channel
-                say(f"<@{user_id}> {response}")
-            # Reply in thread
-            say(f"<@{user_id}> {response}", thread_ts=message_ts)
+            logger.debug("Sending to Gemini...")
+            reply = StreamingReply(say, client, user_id, message_ts)
+            response = await call_llm(cleaned_text, on_partial=reply.update)
+            logger.debug("Gemini Response: %s", response)
+            await reply.finish(response)
         else:
-            logger.info("Empty message, sending default greeting")
+            logger.debug("Empty message, sending default greeting")
             if SHOULD_REPLY_IN_CHANNEL:
                 # Reply in main channel
-                say(f"<@{user_id}> Hi! How can I help you?")
+                await say(f"<@{user_id}> Hi! How can I help you?")
             # Reply in thread
-            say(f"<@{user_id}> Hi! How can I help you?", thread_ts=message_ts)
+            await say(f"<@{user_id}> Hi! How can I help you?", thread_ts=message_ts)
             
     except Exception as error:
-        logger.error(f'Error processing mention: {error}')
-        say('Sorry, I encountered an error processing your message.')
+        logger.error("Error processing mention: %s", error)
+        await say('Sorry, I encountered an error processing your message.')
+
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+background_tasks = set()
+
+async def on_startup(web_app) -> None:
+    task = asyncio.create_task(prewarm_gemini())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def on_cleanup(web_app) -> None:
+    await http_client.aclose()
 
 # Start the app
 if __name__ == "__main__":
@@ -177,9 +539,12 @@ if __name__ == "__main__":
     # Get port from environment variable or default to 3000
     port = int(os.environ.get("PORT", 3000))
     logger.info(f"🚀 Starting HTTP server on port {port}...")
+    server = app.server(port=port)
+    server.web_app.on_startup.append(on_startup)
+    server.web_app.on_cleanup.append(on_cleanup)
     
     try:
-        app.start(port=port)
+        server.start()
     except KeyboardInterrupt:
         logger.info("👋 Bot stopped by user")
     except Exception as e: